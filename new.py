@@ -2,12 +2,21 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import gspread
+from gspread.utils import fill_gaps
 from oauth2client.service_account import ServiceAccountCredentials
-import plotly.express as px
+from requests.adapters import HTTPAdapter
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 import re
 from io import BytesIO
+import functools
+import importlib.util
+import os
 import time
 
+_EMAIL_RE = re.compile(r"[^@]+@[^@]+\.[^@]+")
+# xlsxwriter builds workbooks faster and lighter than openpyxl; fall back if it isn't installed
+EXCEL_ENGINE = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else "openpyxl"
+
 # ---------------------------
 # PAGE CONFIG
 # ---------------------------
@@ -39,14 +48,18 @@ if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 if "user_role" not in st.session_state:
     st.session_state.user_role = "viewer"
+if "import_key" not in st.session_state:
+    st.session_state.import_key = 0  # Bumped after an import to reset the file uploader
 
 # ---------------------------
 # LOGIN
 # ---------------------------
 if not st.session_state.authenticated:
     st.title("🔒 Lumina Waters – Login")
-    code = st.text_input("Enter 6-digit passcode", type="password")
-    if st.button("Login"):
+    with st.form("login_form"):
+        code = st.text_input("Enter 6-digit passcode", type="password")
+        submitted = st.form_submit_button("Login")
+    if submitted:
         if code == st.secrets["APP_PASSCODE"]:
             st.session_state.authenticated = True
             st.session_state.user_role = "admin"
@@ -59,25 +72,43 @@ if not st.session_state.authenticated:
 # ---------------------------
 # GOOGLE SHEETS CONNECTION
 # ---------------------------
+SHEET_TITLES = {
+    "customers": "Customers",
+    "orders": "Orders",
+    "transactions": "Transactions",
+    "expenses": "Expenses",
+    "income": "OtherIncome",
+    "inventory": "Inventory"
+}
+
+def is_rate_limited(exc):
+    return isinstance(exc, gspread.exceptions.APIError) and exc.response.status_code == 429
+
+# Bounded backoff for read quota errors only; appends are never retried, so a row can't be written twice
+retry_reads = retry(
+    retry=retry_if_exception(is_rate_limited),
+    wait=wait_exponential_jitter(initial=1, max=8),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+
 @st.cache_resource
+@retry_reads
 def connect_sheets():
     scope = ["https://spreadsheets.google.com/feeds",
              "https://www.googleapis.com/auth/spreadsheets",
              "https://www.googleapis.com/auth/drive"]
     creds = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["gcp_service_account"], scope)
     client = gspread.authorize(creds)
+    # Keep TLS connections alive across the many Sheets calls per rerun
+    session = getattr(client, "http_client", client).session
+    session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
     sh = client.open("LuminaWatersDB")
-    return {
-        "customers": sh.worksheet("Customers"),
-        "orders": sh.worksheet("Orders"),
-        "transactions": sh.worksheet("Transactions"),
-        "expenses": sh.worksheet("Expenses"),
-        "income": sh.worksheet("OtherIncome"),
-        "inventory": sh.worksheet("Inventory")
-    }
+    by_title = {ws.title: ws for ws in sh.worksheets()}  # One metadata request for all tabs
+    return sh, {key: by_title[title] for key, title in SHEET_TITLES.items()}
 
 try:
-    sheets = connect_sheets()
+    spreadsheet, sheets = connect_sheets()
 except Exception as e:
     st.error("❌ Google Sheets connection failed")
     st.code(str(e))
@@ -86,67 +117,238 @@ except Exception as e:
 # ---------------------------
 # UTILITY FUNCTIONS
 # ---------------------------
-@st.cache_data(ttl=60)  # Reduced cache time to 1 minute for fresher data
-def load_data(sheet_name):
-    try:
-        ws = sheets[sheet_name]
-        values = ws.get_all_values()
-        if len(values) <= 1:
-            return pd.DataFrame()
-        headers = [str(c).strip() for c in values[0]]
-        df = pd.DataFrame(values[1:], columns=headers)
-        
-        # More robust numeric conversion
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in ["amount", "price", "quantity", "qty", "remaining", "paid"]):
-                df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '').str.replace('₹', '').str.strip(), errors='coerce').fillna(0)
-        
-        time.sleep(0.3)
-        return df
-    except Exception as e:
-        st.error(f"❌ Failed to load {sheet_name}: {str(e)}")
+NUMERIC_KEYWORDS = ("amount", "price", "quantity", "qty", "remaining", "paid")
+CATEGORY_KEYWORDS = ("type", "status", "method", "category")  # Low-cardinality labels
+_NUMERIC_COL_RE = re.compile("|".join(NUMERIC_KEYWORDS), re.IGNORECASE)
+_CATEGORY_COL_RE = re.compile("|".join(CATEGORY_KEYWORDS), re.IGNORECASE)
+_NUMBER_NOISE_RE = re.compile(r"[,₹\s]")  # Thousands separators, currency symbol and whitespace
+
+def values_to_dataframe(values):
+    if not values:
         return pd.DataFrame()
+    headers = [str(c).strip() for c in values[0]]
+    if len(values) == 1:
+        return pd.DataFrame(columns=headers)  # Header-only sheet: still empty, but keeps its columns
+    df = pd.DataFrame(values[1:], columns=headers)
+    
+    # More robust numeric conversion; labels are stored as categoricals
+    numeric_cols = [col for col in headers if _NUMERIC_COL_RE.search(col)]
+    category_cols = [col for col in headers if col not in numeric_cols and _CATEGORY_COL_RE.search(col)]
+    if numeric_cols:
+        df[numeric_cols] = df[numeric_cols].apply(
+            lambda s: pd.to_numeric(s.astype(str).str.replace(_NUMBER_NOISE_RE, '', regex=True), errors='coerce')
+        ).fillna(0)
+    # Remaining text columns use Arrow-backed strings: compact storage and C-level .str ops.
+    # astype(dict) also copes with repeated (e.g. blank) header names.
+    dtypes = {col: "string[pyarrow]" for col in headers if col not in numeric_cols}
+    dtypes.update({col: "category" for col in category_cols})
+    return df.astype(dtypes)
+
+CACHE_TTL = 60  # Reduced cache time to 1 minute for fresher data
+MAX_IMPORT_ROWS = 1000  # One append_rows request per import; keeps it well under the Sheets payload limit
+
+# Snapshots hold customer and financial data, so they live in a directory only the app user can access
+DISK_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lumina_finance")
+
+def disk_cache_path(sheet_name):
+    os.makedirs(DISK_CACHE_DIR, mode=0o700, exist_ok=True)
+    os.chmod(DISK_CACHE_DIR, 0o700)  # makedirs leaves an existing directory's mode alone
+    return os.path.join(DISK_CACHE_DIR, f"{sheet_name}.parquet")
+
+def read_disk_cache():
+    """Return the Parquet snapshot written by a previous process if it is still fresh"""
+    try:
+        paths = {key: disk_cache_path(key) for key in SHEET_TITLES}
+        if all(time.time() - os.path.getmtime(p) < CACHE_TTL for p in paths.values()):
+            return {key: pd.read_parquet(p) for key, p in paths.items()}
+    except Exception:
+        pass
+    return None
 
-def get_next_id(sheet_name):
+def write_disk_cache(frames):
     try:
-        ids = sheets[sheet_name].col_values(1)[1:]
-        nums = [int(x) for x in ids if str(x).strip().isdigit()]
-        return max(nums) + 1 if nums else 1
-    except:
+        for key, df in frames.items():
+            df.to_parquet(disk_cache_path(key), index=False)
+    except Exception:
+        clear_disk_cache()  # Never leave a partial snapshot behind
+
+def clear_disk_cache():
+    for key in SHEET_TITLES:
+        try:
+            os.remove(disk_cache_path(key))
+        except OSError:
+            pass
+
+@retry_reads
+def fetch_sheet_values():
+    """Raw valueRanges for every worksheet, in SHEET_TITLES order, from one batchGet request"""
+    return spreadsheet.values_batch_get([f"'{title}'" for title in SHEET_TITLES.values()])["valueRanges"]
+
+@st.cache_resource(ttl=CACHE_TTL)
+def load_all():
+    """Fetch every worksheet in one batchGet; returns (frames, parse errors by sheet). Frames are shared, so copy before mutating"""
+    # A failed request raises instead of returning empty frames, so the failure is never cached
+    frames = read_disk_cache()
+    if frames is not None:
+        return frames, {}
+    frames, errors = {}, {}
+    for key, vr in zip(SHEET_TITLES, fetch_sheet_values()):
+        try:
+            frames[key] = values_to_dataframe(fill_gaps(vr.get("values", [])))
+        except Exception as e:  # One malformed sheet shouldn't blank the others
+            frames[key], errors[key] = pd.DataFrame(), str(e)
+    if not errors:
+        write_disk_cache(frames)
+    return frames, errors
+
+def get_next_id(sheet_name):
+    frames, errors = load_all()
+    if sheet_name in errors:
+        # An unreadable sheet looks empty, and numbering from 1 would reuse existing IDs
+        raise RuntimeError(f"{SHEET_TITLES[sheet_name]} could not be read, so no new ID can be assigned: {errors[sheet_name]}")
+    df = frames[sheet_name]
+    if df.empty:
         return 1
+    ids = pd.to_numeric(df.iloc[:, 0], errors="coerce")
+    return int(ids.max()) + 1 if ids.notna().any() else 1
 
-def append_row_safe(sheet_name, values):
+def clean_value(v):
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    return str(v)
+
+def append_rows_safe(sheet_name, rows):
+    """Append several rows in a single Sheets API call"""
     try:
-        clean = ["" if pd.isna(v) else str(v) for v in values]
-        sheets[sheet_name].append_row(clean)
-        time.sleep(0.5)
-        load_data.clear()  # Clear cache after adding data
+        clean = [[clean_value(v) for v in row] for row in rows]
+        sheets[sheet_name].append_rows(clean, value_input_option="RAW", insert_data_option="INSERT_ROWS")
+        # Invalidate the shared snapshot so every session sees the new rows (and their IDs)
+        clear_disk_cache()
+        load_all.clear()
     except Exception as e:
         st.error(f"❌ Failed to add to {sheet_name}: {str(e)}")
         raise
 
+def append_row_safe(sheet_name, values):
+    append_rows_safe(sheet_name, [values])
+
+def excel_writer(buffer):
+    if EXCEL_ENGINE == "xlsxwriter":
+        # Write strings verbatim instead of scanning every cell for URLs/formulas
+        options = {"strings_to_urls": False, "strings_to_formulas": False}
+        return pd.ExcelWriter(buffer, engine="xlsxwriter", engine_kwargs={"options": options})
+    return pd.ExcelWriter(buffer, engine=EXCEL_ENGINE)
+
+@st.cache_data(ttl=CACHE_TTL)
+def build_workbook(frames):
+    """Serialize {sheet name: DataFrame} to xlsx bytes; unchanged data reuses the cached file"""
+    buffer = BytesIO()
+    with excel_writer(buffer) as writer:
+        for sheet_name, df in frames.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return buffer.getvalue()
+
 def validate_email(email):
-    return bool(re.match(r"[^@]+@[^@]+\.[^@]+", str(email))) if email else True
+    return not email or _EMAIL_RE.match(str(email)) is not None
 
-def paginate_dataframe(df, page_size=15):
+def shift_page(offset_key, delta):
+    st.session_state[offset_key] = max(0, st.session_state.get(offset_key, 0) + delta)
+
+def paginate_dataframe(df, key, page_size=1000, max_rows=10_000):
+    """Small tables are shown whole (st.dataframe scrolls them); large ones page by offset"""
     if df.empty:
         st.info("No data available")
-        return pd.DataFrame()
-    total_pages = max(1, (len(df) + page_size - 1) // page_size)
-    page = st.selectbox("Page", range(1, total_pages + 1), key=f"page_{id(df)}")
-    start = (page - 1) * page_size
-    return df.iloc[start:start + page_size]
+        return df
+    if len(df) <= max_rows:
+        return df
+    offset_key = f"page_{key}"
+    offset = min(st.session_state.get(offset_key, 0), (len(df) - 1) // page_size * page_size)
+    st.session_state[offset_key] = offset
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    prev_col.button("◀ Prev", key=f"{offset_key}_prev", on_click=shift_page,
+                    args=(offset_key, -page_size), disabled=offset == 0)
+    next_col.button("Next ▶", key=f"{offset_key}_next", on_click=shift_page,
+                    args=(offset_key, page_size), disabled=offset + page_size >= len(df))
+    info_col.caption(f"Rows {offset + 1:,}–{min(offset + page_size, len(df)):,} of {len(df):,}")
+    return df.iloc[offset:offset + page_size]
+
+@functools.lru_cache(maxsize=256)
+def find_column_cached(columns, keywords):
+    words = keywords.lower().split()
+    for col in columns:
+        col_lower = col.lower()
+        if all(word in col_lower for word in words):
+            return col
+    return None
 
 def find_column(df, keywords):
     """Helper function to find column by keywords"""
     if df.empty:
         return None
-    for col in df.columns:
-        col_lower = col.lower()
-        if all(keyword.lower() in col_lower for keyword in keywords.split()):
-            return col
-    return None
+    return find_column_cached(tuple(df.columns), keywords)
+
+@st.cache_data(ttl=CACHE_TTL)
+def customer_names(customers):
+    """Build the ID -> name lookup for the customers sheet"""
+    if customers.empty:
+        return {}
+    id_col = find_column(customers, "customer id") or customers.columns[0]
+    name_col = find_column(customers, "name") or (customers.columns[1] if len(customers.columns) > 1 else id_col)
+    return dict(zip(customers[id_col].astype(str), customers[name_col].astype(str)))
+
+@st.cache_data(ttl=CACHE_TTL)
+def customer_search_index(customers):
+    """Lowercased Name/Contact/Email text per customer, joined for a single search pass"""
+    cols = [c for c in (find_column(customers, k) for k in ("name", "contact", "email")) if c]
+    if not cols:
+        return pd.Series("", index=customers.index)
+    first, *rest = [customers[c].astype(str) for c in cols]
+    haystack = first.str.cat(rest, sep="\x1f") if rest else first
+    return haystack.str.lower()
+
+@st.cache_data(ttl=CACHE_TTL)
+def total_by_order(orders):
+    """Order total for each Order ID"""
+    order_id_col = find_column(orders, "order id")
+    total_amount_col = find_column(orders, "total amount")
+    if not order_id_col or not total_amount_col:
+        return {}
+    return orders.groupby(orders[order_id_col].astype(str))[total_amount_col].sum().to_dict()
+
+@st.cache_data(ttl=CACHE_TTL)
+def paid_by_order(transactions):
+    """Total amount paid so far for each Order ID"""
+    order_id_col = find_column(transactions, "order id")
+    amount_paid_col = find_column(transactions, "amount paid")
+    if not order_id_col or not amount_paid_col:
+        return {}
+    return transactions.groupby(transactions[order_id_col].astype(str))[amount_paid_col].sum().to_dict()
+
+def safe_sum(df, keywords, default):
+    col = find_column(df, keywords) or default
+    return float(df[col].sum()) if col in df.columns else 0.0
+
+def summarize(data):
+    """Headline totals shared by the Dashboard and Reports tabs"""
+    orders, transactions = data["orders"], data["transactions"]
+    expenses, income = data["expenses"], data["income"]
+    totals = {
+        "total_sales": safe_sum(orders, "total amount", "Total Amount"),
+        "paid": safe_sum(transactions, "amount paid", "Amount Paid"),
+        "extra_income": safe_sum(income, "amount", "Amount"),
+        "total_expenses": safe_sum(expenses, "amount", "Amount"),
+    }
+    totals["net_balance"] = totals["paid"] + totals["extra_income"] - totals["total_expenses"]
+    return totals
+
+@st.cache_data(ttl=CACHE_TTL)
+def build_expense_pie(expenses, category_col, amount_col):
+    """Aggregate expenses by category and build the pie; None when there is nothing to plot"""
+    expense_summary = expenses.groupby(category_col, observed=True, sort=False)[amount_col].sum().reset_index()
+    if expense_summary.empty:
+        return None
+    import plotly.express as px  # Deferred: only the Dashboard pie needs it, and it's slow to import
+    return px.pie(expense_summary, names=category_col, values=amount_col, title="Expense Breakdown")
 
 # ---------------------------
 # HEADER WITH LOGO
@@ -160,6 +362,20 @@ with col_logo:
 with col_title:
     st.title("💧 Lumina Waters Finance")
 
+# ---------------------------
+# DATA SNAPSHOT
+# ---------------------------
+# Load every sheet once per rerun; all tabs below read from this dict
+try:
+    frames, load_errors = load_all()
+except Exception as e:
+    st.error(f"❌ Failed to load data: {str(e)}")
+    frames, load_errors = {key: pd.DataFrame() for key in SHEET_TITLES}, {}
+for key, err in load_errors.items():
+    st.error(f"❌ Failed to load {SHEET_TITLES[key]}: {err}")
+data = {key: df.copy() for key, df in frames.items()}
+kpis = summarize(data)
+
 # ---------------------------
 # NAVIGATION
 # ---------------------------
@@ -173,22 +389,16 @@ tabs = st.tabs([
 # ---------------------------
 with tabs[0]:
     st.header("📊 Financial Overview")
-    orders = load_data("orders")
-    transactions = load_data("transactions")
-    expenses = load_data("expenses")
-    income = load_data("income")
+    expenses = data["expenses"]
 
     # Use dynamic column finding
-    total_amount_col = find_column(orders, "total amount") or "Total Amount"
-    amount_paid_col = find_column(transactions, "amount paid") or "Amount Paid"
-    income_amount_col = find_column(income, "amount") or "Amount"
     expense_amount_col = find_column(expenses, "amount") or "Amount"
 
-    total_sales = orders[total_amount_col].sum() if total_amount_col in orders.columns else 0
-    paid = transactions[amount_paid_col].sum() if amount_paid_col in transactions.columns else 0
-    extra_income = income[income_amount_col].sum() if income_amount_col in income.columns else 0
-    total_expenses = expenses[expense_amount_col].sum() if expense_amount_col in expenses.columns else 0
-    net_balance = paid + extra_income - total_expenses
+    total_sales = kpis["total_sales"]
+    paid = kpis["paid"]
+    extra_income = kpis["extra_income"]
+    total_expenses = kpis["total_expenses"]
+    net_balance = kpis["net_balance"]
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Sales", f"₹ {total_sales:,.0f}")
@@ -198,9 +408,8 @@ with tabs[0]:
 
     category_col = find_column(expenses, "category")
     if not expenses.empty and category_col and category_col in expenses.columns:
-        expense_summary = expenses.groupby(category_col)[expense_amount_col].sum().reset_index()
-        if not expense_summary.empty:
-            fig = px.pie(expense_summary, names=category_col, values=expense_amount_col, title="Expense Breakdown")
+        fig = build_expense_pie(expenses, category_col, expense_amount_col)
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
 
 # ---------------------------
@@ -208,27 +417,19 @@ with tabs[0]:
 # ---------------------------
 with tabs[1]:
     st.header("👥 Customers")
-    customers = load_data("customers")
+    customers = data["customers"]
     
     if not customers.empty:
-        search = st.text_input("Search by Name/Contact/Email")
+        with st.form("search_form"):
+            search = st.text_input("Search by Name/Contact/Email", key="cust_search")
+            st.form_submit_button("Search")
         if search:
-            name_col = find_column(customers, "name") or "Name"
-            contact_col = find_column(customers, "contact") or "Contact"
-            email_col = find_column(customers, "email") or "Email"
-            
-            mask = pd.Series([False] * len(customers))
-            if name_col in customers.columns:
-                mask |= customers[name_col].astype(str).str.contains(search, case=False, na=False)
-            if contact_col in customers.columns:
-                mask |= customers[contact_col].astype(str).str.contains(search, case=False, na=False)
-            if email_col in customers.columns:
-                mask |= customers[email_col].astype(str).str.contains(search, case=False, na=False)
+            mask = customer_search_index(customers).str.contains(search.lower(), regex=False)
             customers = customers[mask]
 
-        paginated = paginate_dataframe(customers)
+        paginated = paginate_dataframe(customers, "customers")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No customers yet. Add your first customer below!")
 
@@ -262,13 +463,13 @@ with tabs[1]:
 # ---------------------------
 with tabs[2]:
     st.header("📝 Orders")
-    orders = load_data("orders")
-    customers = load_data("customers")
+    orders = data["orders"]
+    customers = data["customers"]
 
     if not orders.empty:
-        paginated = paginate_dataframe(orders)
+        paginated = paginate_dataframe(orders, "orders")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No orders yet. Create your first order below!")
 
@@ -276,12 +477,8 @@ with tabs[2]:
         with st.expander("➕ Add Order"):
             with st.form("add_order"):
                 if not customers.empty:
-                    customer_id_col = find_column(customers, "customer id") or customers.columns[0]
-                    name_col = find_column(customers, "name") or customers.columns[1] if len(customers.columns) > 1 else customer_id_col
-                    
-                    customer_options = [f"{row[customer_id_col]} – {row[name_col]}" for _, row in customers.iterrows()]
-                    selected = st.selectbox("Customer *", customer_options)
-                    cid = selected.split(" – ")[0] if " – " in selected else selected
+                    id_to_name = customer_names(customers)
+                    cid = st.selectbox("Customer *", list(id_to_name), format_func=lambda i: f"{i} – {id_to_name[i]}")
                 else:
                     cid = st.text_input("Customer ID *")
 
@@ -313,13 +510,13 @@ with tabs[2]:
 # ---------------------------
 with tabs[3]:
     st.header("💳 Transactions")
-    transactions = load_data("transactions")
-    orders = load_data("orders")
+    transactions = data["transactions"]
+    orders = data["orders"]
 
     if not transactions.empty:
-        paginated = paginate_dataframe(transactions)
+        paginated = paginate_dataframe(transactions, "transactions")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No transactions yet. Record your first payment below!")
 
@@ -342,7 +539,6 @@ with tabs[3]:
                 submitted = st.form_submit_button("Save Transaction")
                 if submitted:
                     total_amount_col = find_column(orders, "total amount")
-                    amount_paid_col = find_column(transactions, "amount paid")
 
                     if not total_amount_col or total_amount_col not in orders.columns:
                         st.error("Could not find 'Total Amount' column in Orders sheet.")
@@ -350,16 +546,8 @@ with tabs[3]:
                         st.error("Please enter a valid payment amount")
                     else:
                         try:
-                            total = orders[orders[order_id_col].astype(str) == str(oid)][total_amount_col].sum()
-                            
-                            if not transactions.empty and amount_paid_col and amount_paid_col in transactions.columns:
-                                transaction_order_id_col = find_column(transactions, "order id")
-                                if transaction_order_id_col:
-                                    paid_so_far = transactions[transactions[transaction_order_id_col].astype(str) == str(oid)][amount_paid_col].sum()
-                                else:
-                                    paid_so_far = 0
-                            else:
-                                paid_so_far = 0
+                            total = total_by_order(orders).get(str(oid), 0)
+                            paid_so_far = paid_by_order(transactions).get(str(oid), 0)
                             
                             remaining = total - (paid_so_far + amount)
                             append_row_safe("transactions", [get_next_id("transactions"), oid, str(date), amount, method, remaining, notes])
@@ -374,12 +562,12 @@ with tabs[3]:
 # ---------------------------
 with tabs[4]:
     st.header("🧾 Expenses")
-    expenses = load_data("expenses")
+    expenses = data["expenses"]
 
     if not expenses.empty:
-        paginated = paginate_dataframe(expenses)
+        paginated = paginate_dataframe(expenses, "expenses")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No expenses yet. Record your first expense below!")
 
@@ -412,12 +600,12 @@ with tabs[4]:
 # ---------------------------
 with tabs[5]:
     st.header("💰 Other Income")
-    income = load_data("income")
+    income = data["income"]
 
     if not income.empty:
-        paginated = paginate_dataframe(income)
+        paginated = paginate_dataframe(income, "income")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No other income yet. Record your first income entry below!")
 
@@ -450,12 +638,12 @@ with tabs[5]:
 # ---------------------------
 with tabs[6]:
     st.header("ðŸ“¦ Inventory")
-    inventory = load_data("inventory")
+    inventory = data["inventory"]
 
     if not inventory.empty:
-        paginated = paginate_dataframe(inventory)
+        paginated = paginate_dataframe(inventory, "inventory")
         if not paginated.empty:
-            st.dataframe(paginated, use_container_width=True, hide_index=True)
+            st.dataframe(paginated, use_container_width=True, hide_index=True, height=450)
     else:
         st.info("No inventory items yet. Add your first item below!")
 
@@ -485,24 +673,21 @@ with tabs[7]:
     st.header("ðŸ“ˆ Financial Reports")
     st.subheader("Generate and Download Reports")
 
-    customers = load_data("customers")
-    orders = load_data("orders")
-    transactions = load_data("transactions")
-    expenses = load_data("expenses")
-    income = load_data("income")
-    inventory = load_data("inventory")
+    customers = data["customers"]
+    orders = data["orders"]
+    transactions = data["transactions"]
+    expenses = data["expenses"]
+    income = data["income"]
+    inventory = data["inventory"]
 
     # Dynamic column finding for all calculations
     total_amount_col = find_column(orders, "total amount") or "Total Amount"
     amount_paid_col = find_column(transactions, "amount paid") or "Amount Paid"
-    income_amount_col = find_column(income, "amount") or "Amount"
-    expense_amount_col = find_column(expenses, "amount") or "Amount"
 
-    total_sales = orders[total_amount_col].sum() if total_amount_col in orders.columns else 0
-    paid = transactions[amount_paid_col].sum() if amount_paid_col in transactions.columns else 0
-    extra_income = income[income_amount_col].sum() if income_amount_col in income.columns else 0
-    total_expenses = expenses[expense_amount_col].sum() if expense_amount_col in expenses.columns else 0
-    net_profit = paid + extra_income - total_expenses
+    total_sales = kpis["total_sales"]
+    extra_income = kpis["extra_income"]
+    total_expenses = kpis["total_expenses"]
+    net_profit = kpis["net_balance"]
 
     pl_df = pd.DataFrame({
         "Category": ["Sales Revenue", "Other Income", "Total Income", "Expenses", "Net Profit"],
@@ -515,7 +700,7 @@ with tabs[7]:
     unit_price_col = find_column(inventory, "unit price")
     if not inventory.empty and qty_col and unit_price_col:
         if qty_col in inventory.columns and unit_price_col in inventory.columns:
-            inventory["Value"] = inventory[qty_col] * inventory[unit_price_col]
+            inventory = inventory.assign(Value=inventory[qty_col] * inventory[unit_price_col])
             inv_total = inventory["Value"].sum()
 
     # Receivables calculation
@@ -526,22 +711,18 @@ with tabs[7]:
         trans_order_id_col = find_column(transactions, "order id")
         
         if order_id_col and trans_order_id_col and amount_paid_col and total_amount_col:
-            if order_id_col in orders.columns and trans_order_id_col in transactions.columns:
-                paid_by_order = transactions.groupby(trans_order_id_col)[amount_paid_col].sum().reset_index()
-                paid_by_order.columns = [order_id_col, "TotalPaid"]
-                
-                orders_merged = orders.merge(paid_by_order, on=order_id_col, how="left")
-                orders_merged["TotalPaid"] = orders_merged["TotalPaid"].fillna(0)
-                orders_merged["Unpaid"] = orders_merged[total_amount_col] - orders_merged["TotalPaid"]
+            if order_id_col in orders.columns and trans_order_id_col in transactions.columns and total_amount_col in orders.columns:
+                total_paid = orders[order_id_col].astype(str).map(paid_by_order(transactions)).fillna(0)
+                unpaid = orders[total_amount_col] - total_paid
                 
                 customer_id_col = find_column(orders, "customer id")
                 select_cols = [order_id_col]
-                if customer_id_col and customer_id_col in orders_merged.columns:
+                if customer_id_col and customer_id_col in orders.columns:
                     select_cols.append(customer_id_col)
-                select_cols += [total_amount_col, "Unpaid"]
+                select_cols.append(total_amount_col)
                 
-                receivables = orders_merged[orders_merged["Unpaid"] > 0][select_cols]
-                rec_total = orders_merged["Unpaid"].sum()
+                receivables = orders.loc[unpaid > 0, select_cols].assign(Unpaid=unpaid)
+                rec_total = unpaid.sum()
 
     # Display metrics
     col1, col2, col3 = st.columns(3)
@@ -552,28 +733,15 @@ with tabs[7]:
     # Full report generation
     if st.button("ðŸ“Š Generate Full Financial Report (Excel)"):
         try:
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-                pl_df.to_excel(writer, sheet_name="Profit & Loss", index=False)
-                if not orders.empty:
-                    orders.to_excel(writer, sheet_name="Orders", index=False)
-                if not transactions.empty:
-                    transactions.to_excel(writer, sheet_name="Transactions", index=False)
-                if not expenses.empty:
-                    expenses.to_excel(writer, sheet_name="Expenses", index=False)
-                if not income.empty:
-                    income.to_excel(writer, sheet_name="Other Income", index=False)
-                if not inventory.empty:
-                    inventory.to_excel(writer, sheet_name="Inventory", index=False)
-                if not customers.empty:
-                    customers.to_excel(writer, sheet_name="Customers", index=False)
-                if not receivables.empty:
-                    receivables.to_excel(writer, sheet_name="Receivables", index=False)
-
-            buffer.seek(0)
+            report_sheets = [
+                ("Profit & Loss", pl_df), ("Orders", orders), ("Transactions", transactions),
+                ("Expenses", expenses), ("Other Income", income), ("Inventory", inventory),
+                ("Customers", customers), ("Receivables", receivables)
+            ]
+            report = build_workbook({name: df for name, df in report_sheets if not df.empty})
             st.download_button(
                 label="â¬‡ï¸ Download Full Report.xlsx",
-                data=buffer,
+                data=report,
                 file_name=f"lumina_waters_report_{datetime.today().strftime('%Y%m%d')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
@@ -609,24 +777,28 @@ with tabs[8]:
             st.session_state.user_role = "viewer"
             st.rerun()
     
+    st.divider()
+    st.subheader("Data")
+    st.caption(f"Sheet data is cached for {CACHE_TTL} seconds.")
+    if st.button("🔄 Refresh Data"):
+        clear_disk_cache()
+        load_all.clear()
+        st.rerun()
+
     st.divider()
     
     if st.session_state.user_role == "admin":
         st.subheader("Data Export")
         if st.button("ðŸ“¥ Export All Data (Excel)"):
             try:
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-                    load_data("customers").to_excel(writer, sheet_name="Customers", index=False)
-                    load_data("orders").to_excel(writer, sheet_name="Orders", index=False)
-                    load_data("transactions").to_excel(writer, sheet_name="Transactions", index=False)
-                    load_data("expenses").to_excel(writer, sheet_name="Expenses", index=False)
-                    load_data("income").to_excel(writer, sheet_name="Other Income", index=False)
-                    load_data("inventory").to_excel(writer, sheet_name="Inventory", index=False)
-                buffer.seek(0)
+                export_sheets = [
+                    ("customers", "Customers"), ("orders", "Orders"), ("transactions", "Transactions"),
+                    ("expenses", "Expenses"), ("income", "Other Income"), ("inventory", "Inventory")
+                ]
+                export = build_workbook({label: data[key] for key, label in export_sheets})
                 st.download_button(
                     "â¬‡ï¸ Download All Data.xlsx", 
-                    data=buffer, 
+                    data=export, 
                     file_name=f"lumina_waters_all_data_{datetime.today().strftime('%Y%m%d')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -634,6 +806,44 @@ with tabs[8]:
             except Exception as e:
                 st.error(f"Failed to export data: {str(e)}")
 
+        st.subheader("Bulk Import")
+        import_sheet = st.selectbox("Import into", list(SHEET_TITLES), format_func=SHEET_TITLES.get)
+        upload = st.file_uploader(f"CSV file with the same columns as the sheet (up to {MAX_IMPORT_ROWS} rows)",
+                                  type="csv", key=f"import_upload_{st.session_state.import_key}")
+        if upload is not None:
+            try:
+                import_df = pd.read_csv(upload, dtype=str, keep_default_na=False)
+            except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+                st.error(f"Could not read the CSV file: {str(e)}")
+            else:
+                expected = list(data[import_sheet].columns)
+                missing = [c for c in expected if c not in import_df.columns]
+                if import_sheet in load_errors:
+                    st.error(f"{SHEET_TITLES[import_sheet]} could not be read, so nothing can be imported into it")
+                elif not expected:
+                    st.error(f"{SHEET_TITLES[import_sheet]} has no header row; add the column headers in the sheet first")
+                elif missing:
+                    st.error(f"Missing columns: {', '.join(missing)}")
+                elif import_df.empty:
+                    st.info("The uploaded file has no rows")
+                elif len(import_df) > MAX_IMPORT_ROWS:
+                    st.error(f"The file has {len(import_df)} rows; split it into files of at most {MAX_IMPORT_ROWS} rows")
+                else:
+                    import_df = import_df[expected].copy()
+                    st.caption(f"New {expected[0]} values are assigned on save; IDs in the file are ignored")
+                    st.dataframe(import_df.head(10), use_container_width=True, hide_index=True)
+                    if st.button(f"Save {len(import_df)} rows"):
+                        try:
+                            next_id = get_next_id(import_sheet)
+                            import_df[expected[0]] = range(next_id, next_id + len(import_df))
+                            append_rows_safe(import_sheet, import_df.values.tolist())
+                            st.session_state.import_key += 1
+                            st.success(f"✅ Imported {len(import_df)} rows into {SHEET_TITLES[import_sheet]}!")
+                            time.sleep(1)
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Failed to import rows: {str(e)}")
+
     st.divider()
     st.subheader("ðŸ’¬ Feedback")
     with st.form("feedback_form"):